@@ -0,0 +1,193 @@
+"""Replay lotto tickets against the draw history.
+
+Tickets are scored against every draw by match class (3, 3ZZ, 4, ... 6) using
+the winnings actually paid for that draw. Tickets and draws are encoded as
+bitmasks (see drawindex.py), so a chunk of tickets is scored against all draws
+with a few NumPy matrix operations. Memory is bounded by the chunk size.
+
+    from backtest import Backtest, expand_system, quick_picks
+    bt = Backtest(harvest.DrawStore.from_dir("data").draws)
+    bt.run([[1, 2, 3, 4, 5, 6]])
+    bt.run(expand_system([1, 2, 3, 4, 5, 6, 7, 8]))
+    bt.run(quick_picks(1_000_000, seed=42), processes=4)
+"""
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from drawindex import DrawIndex, fetch_draws, popcount
+
+# Winnings before 2002 were paid in ATS. We convert them to EUR.
+EUR_RATES = {"EUR": 1.0, "ATS": 13.7603}
+
+# Number of (ticket, draw) pairs scored at once.
+CHUNK_CELLS = 4_000_000
+
+
+def _class_code(matches: int, zz_hit: int) -> int:
+    "Return the column used for a match class in the payout table."
+    return matches * 2 + zz_hit
+
+
+# Map each possible (matches, zz) combination to the win class it belongs to.
+# Older draws have no 4ZZ and 3ZZ classes, these fall back to 4 and 3.
+CLASS_CANDIDATES = {
+    _class_code(6, 0): ["6"],
+    _class_code(6, 1): ["6"],
+    _class_code(5, 1): ["5ZZ"],
+    _class_code(5, 0): ["5"],
+    _class_code(4, 1): ["4ZZ", "4"],
+    _class_code(4, 0): ["4"],
+    _class_code(3, 1): ["3ZZ", "3"],
+    _class_code(3, 0): ["3"],
+}
+NUM_CODES = _class_code(6, 1) + 1
+
+
+def tickets_to_masks(tickets) -> np.ndarray:
+    "Convert a sequence of tickets (6 numbers each) to an array of bitmasks."
+    tickets = np.asarray(tickets)
+    if tickets.ndim != 2 or tickets.shape[1] != 6:
+        raise ValueError("Each ticket must have exactly 6 numbers.")
+    if tickets.size and not np.issubdtype(tickets.dtype, np.integer):
+        raise ValueError("Ticket numbers must be integers.")
+    if tickets.size and (tickets.min() < 1 or tickets.max() > 45):
+        raise ValueError("Ticket numbers must be between 1 and 45.")
+    masks = np.bitwise_or.reduce(np.uint64(1) << tickets.astype(np.uint64), axis=1)
+    if np.any(popcount(masks) != 6):
+        raise ValueError("Ticket numbers must be unique.")
+    return masks
+
+
+def expand_system(numbers: Iterable[int]) -> List[List[int]]:
+    "Return all 6 number tickets played by a system ticket (more than 6 numbers)."
+    numbers = sorted(set(numbers))
+    if len(numbers) < 6:
+        raise ValueError("A system needs at least 6 numbers.")
+    return [list(ticket) for ticket in itertools.combinations(numbers, 6)]
+
+
+def quick_picks(count: int, seed: Optional[int] = None) -> np.ndarray:
+    "Return count random tickets as array of shape (count, 6)."
+    rng = np.random.default_rng(seed)
+    tickets = np.empty((count, 6), dtype=np.uint8)
+    chunk_size = 100_000
+    for start in range(0, count, chunk_size):
+        stop = min(start + chunk_size, count)
+        keys = rng.random((stop - start, 45))
+        tickets[start:stop] = np.argpartition(keys, 6, axis=1)[:, :6] + 1
+    return tickets
+
+
+def _score_chunk(
+    ticket_masks: np.ndarray,
+    draw_masks: np.ndarray,
+    draw_zz: np.ndarray,
+    payouts: np.ndarray,
+):
+    """Score a chunk of tickets against all draws.
+
+    Return the winnings of each ticket and the number of hits per class code.
+    """
+    codes = popcount(ticket_masks[:, None] & draw_masks[None, :]).astype(np.int32)
+    codes *= 2
+    codes += ((ticket_masks[:, None] >> draw_zz[None, :]) & np.uint64(1)).astype(
+        np.int32
+    )
+    # index into the flattened payout table: draw * NUM_CODES + code
+    offsets = np.arange(0, len(draw_masks) * NUM_CODES, NUM_CODES, dtype=np.int32)
+    winnings = np.take(payouts.ravel(), codes + offsets[None, :]).sum(axis=1)
+    return winnings, np.bincount(codes.ravel(), minlength=NUM_CODES)
+
+
+_WORKER_DRAWS = ()
+
+
+def _init_worker(draw_masks, draw_zz, payouts):
+    "Keep the draw arrays in a worker process."
+    global _WORKER_DRAWS  # pylint: disable=W0603
+    _WORKER_DRAWS = (draw_masks, draw_zz, payouts)
+
+
+def _score_chunk_in_worker(ticket_masks):
+    "Score a chunk of tickets against the draws set by _init_worker."
+    return _score_chunk(ticket_masks, *_WORKER_DRAWS)
+
+
+class Backtest:
+    """Score tickets against a list of draws (as returned by harvest.fetch_data).
+
+    Winnings are converted to EUR.
+    """
+
+    def __init__(self, draws: List[Dict]):
+        index = DrawIndex(draws)
+        self.dates = index.dates
+        self.draw_masks = index.masks
+        self.draw_zz = np.array([draw["ZZ"] for draw in draws], dtype=np.uint64)
+        self.payouts = np.zeros((len(draws), NUM_CODES))
+        for pos, draw in enumerate(draws):
+            results = draw["results"]
+            rate = EUR_RATES[results.get("currency", "EUR")]
+            for code, candidates in CLASS_CANDIDATES.items():
+                for win_class in candidates:
+                    if win_class in results:
+                        self.payouts[pos, code] = results[win_class]["winnings"] / rate
+                        break
+
+    @classmethod
+    def from_years(cls, years: Iterable[int]) -> "Backtest":
+        "Create a Backtest for draws fetched via harvest.fetch_data()."
+        return cls(fetch_draws(years))
+
+    def chunk_size(self) -> int:
+        "Return the number of tickets scored at once."
+        return max(1, CHUNK_CELLS // max(1, len(self.dates)))
+
+    def run(self, tickets, processes: Optional[int] = None) -> Dict:
+        """Score all tickets against all draws.
+
+        tickets is a sequence of 6 number tickets or an array of shape (n, 6).
+        If processes is set, chunks are scored in that many processes.
+
+        Returns a dict with the total winnings, the winnings of each ticket
+        and the number of hits for each win class. Hits are counted by
+        matched numbers and ZZ, so a 4 + ZZ before 2011 counts as 4ZZ,
+        though it was paid as 4.
+        """
+        ticket_masks = tickets_to_masks(tickets)
+        chunks = [
+            ticket_masks[start : start + self.chunk_size()]
+            for start in range(0, len(ticket_masks), self.chunk_size())
+        ]
+        if processes:
+            with ProcessPoolExecutor(
+                processes,
+                initializer=_init_worker,
+                initargs=(self.draw_masks, self.draw_zz, self.payouts),
+            ) as executor:
+                scored = list(executor.map(_score_chunk_in_worker, chunks))
+        else:
+            scored = [
+                _score_chunk(chunk, self.draw_masks, self.draw_zz, self.payouts)
+                for chunk in chunks
+            ]
+        ticket_winnings = np.concatenate(
+            [winnings for winnings, _ in scored] or [np.zeros(0)]
+        )
+        code_counts = sum(
+            (counts for _, counts in scored), np.zeros(NUM_CODES, dtype=np.int64)
+        )
+        classes = {}
+        for code, candidates in CLASS_CANDIDATES.items():
+            win_class = candidates[0]
+            classes[win_class] = classes.get(win_class, 0) + int(code_counts[code])
+        return {
+            "tickets": len(ticket_masks),
+            "draws": len(self.dates),
+            "winnings": float(ticket_winnings.sum()),
+            "ticket_winnings": ticket_winnings,
+            "classes": classes,
+        }
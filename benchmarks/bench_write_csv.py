@@ -0,0 +1,119 @@
+"""Compare the csv export of harvest.write_csv with the original implementation.
+
+Run from the repository root:
+
+    python benchmarks/bench_write_csv.py [NUM_DRAWS]
+"""
+import csv
+import os
+import sys
+import tempfile
+import timeit
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import harvest  # pylint: disable=C0413
+
+# pylint: disable=C0301
+LINES = [
+    "21.11.;aufsteigend;1;13;24;30;36;38;Zz;19;6er;2;à;1.864.444,50;5er + ZZ;2;à;108.025,80;5er;160;à;1.473,00;4er + ZZ;477;à;172,90;;;;;;",
+    ";gezogen;38;24;13;36;30;1;Zz;19;4er;8.099;à;48,00;3er + ZZ;11.676;à;16,10;3er;135.104;à;5,10;ZZ;472.879;à;1,10;;;;;;",
+]
+
+
+def original_rows(data: List) -> List[List]:
+    "The row building of write_csv before make_table_row was introduced."
+    rows = []
+    for draw in data:
+        row = []
+        row.append(draw["date"])
+        row.append(",".join([str(n) for n in draw["numbers"]]))
+        row.append(draw["ZZ"])
+        row.append(draw["results"]["currency"])
+        row.append(draw["results"]["6"]["count"])
+        row.append(draw["results"]["6"]["winnings"])
+        if "5ZZ" in draw["results"]:
+            row.append(draw["results"]["5ZZ"]["count"])
+            row.append(draw["results"]["5ZZ"]["winnings"])
+        else:
+            row.append("")
+            row.append("")
+        row.append(draw["results"]["5"]["count"])
+        row.append(draw["results"]["5"]["winnings"])
+        if "4ZZ" in draw["results"]:
+            row.append(draw["results"]["4ZZ"]["count"])
+            row.append(draw["results"]["4ZZ"]["winnings"])
+        else:
+            row.append("")
+            row.append("")
+        row.append(draw["results"]["4"]["count"])
+        row.append(draw["results"]["4"]["winnings"])
+        if "3ZZ" in draw["results"]:
+            row.append(draw["results"]["3ZZ"]["count"])
+            row.append(draw["results"]["3ZZ"]["winnings"])
+        else:
+            row.append("")
+            row.append("")
+        row.append(draw["results"]["3"]["count"])
+        row.append(draw["results"]["3"]["winnings"])
+        rows.append(row)
+    return rows
+
+
+def original_write_csv(data: List, data_dir: str, year: int) -> None:
+    "The write_csv implementation before make_table_row was introduced."
+    rows = []
+    rows.append(
+        [
+            "date",
+            "numbers",
+            "zz",
+            "currency",
+            "count_6",
+            "winnings_6",
+            "count_5zz",
+            "winnings_5zz",
+            "count_5",
+            "winnings_5",
+            "count_4zz",
+            "winnings_4zz",
+            "count_4",
+            "winnings_4",
+            "count_3zz",
+            "winnings_3zz",
+            "count_3",
+            "winnings_3",
+        ]
+    )
+    rows += original_rows(data)
+    os.makedirs(os.path.join(data_dir, "csv"), exist_ok=True)
+    filename = os.path.join(data_dir, "csv", f"{year}.csv")
+    with open(filename, "w", encoding="utf-8") as csvfile:
+        writer = csv.writer(csvfile, delimiter=";")
+        writer.writerows(rows)
+
+
+def best_of(func, repeat: int) -> float:
+    "Return the best time of repeat runs of 3 calls of func."
+    return min(timeit.repeat(func, number=3, repeat=repeat))
+
+
+def main(num_draws: int = 20000, repeat: int = 10) -> None:
+    "Time both implementations and print the best of repeat runs."
+    data = harvest.parse_modern_lines(LINES * num_draws, 2020)
+    assert original_rows(data) == list(map(harvest.make_table_row, data))
+    print(f"3 x {num_draws} draws, best of {repeat}")
+    print(
+        f"rows     original: {best_of(lambda: original_rows(data), repeat):.3f}s  "
+        "make_table_row: "
+        f"{best_of(lambda: list(map(harvest.make_table_row, data)), repeat):.3f}s"
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        original = best_of(lambda: original_write_csv(data, tmpdir, 2020), repeat)
+        current = best_of(lambda: harvest.write_csv(data, tmpdir, 2020), repeat)
+    print(f"csv file original: {original:.3f}s  write_csv: {current:.3f}s")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,101 @@
+"""Bitmask index for fast lookups of number combinations over all draws.
+
+Each draw is encoded as a 64 bit integer, where bit n is set if number n
+was drawn. All draws are kept in a NumPy array, so subset and overlap
+queries are a vectorized AND followed by a popcount.
+
+    from drawindex import DrawIndex
+    index = DrawIndex.from_dir("data")
+    index.contains([1, 2, 3, 4, 5, 6])
+    index.at_least([3, 7, 12, 19, 33, 41], 4)
+    index.count([7, 12])
+"""
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+import harvest
+
+
+def to_mask(numbers: Iterable[int]) -> int:
+    "Return the bitmask for numbers (bit n is set for number n)."
+    mask = 0
+    for number in numbers:
+        if not 1 <= number <= 45:
+            raise ValueError(f"Not a lotto number: {number}")
+        mask |= 1 << number
+    return mask
+
+
+def popcount(values: np.ndarray) -> np.ndarray:
+    "Return the number of set bits for each element of an uint64 array."
+    if hasattr(np, "bitwise_count"):  # numpy >= 2.0
+        return np.bitwise_count(values)
+    # SWAR popcount for older numpy versions
+    values = values - ((values >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    values = (values & np.uint64(0x3333333333333333)) + (
+        (values >> np.uint64(2)) & np.uint64(0x3333333333333333)
+    )
+    values = (values + (values >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return (values * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+def fetch_draws(years: Iterable[int]) -> List[Dict]:
+    "Return the draws of all years via harvest.fetch_data()."
+    draws = []
+    for year in years:
+        draws += harvest.fetch_data(year)
+    return draws
+
+
+class DrawIndex:
+    """Index over the drawn numbers (without ZZ) of a list of draws."""
+
+    def __init__(self, draws: List[Dict]):
+        self.dates = [draw["date"] for draw in draws]
+        self.masks = np.fromiter(
+            (to_mask(draw["numbers"]) for draw in draws),
+            dtype=np.uint64,
+            count=len(draws),
+        )
+        self._exact = {}  # mask: list of positions in self.dates
+        for pos, mask in enumerate(self.masks.tolist()):
+            self._exact.setdefault(mask, []).append(pos)
+
+    @classmethod
+    def from_years(cls, years: Iterable[int]) -> "DrawIndex":
+        "Build the index from draws fetched via harvest.fetch_data()."
+        return cls(fetch_draws(years))
+
+    @classmethod
+    def from_dir(cls, data_dir: str) -> "DrawIndex":
+        "Build the index from json files written to data_dir."
+        return cls(harvest.DrawStore.from_dir(data_dir).draws)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def contains(self, numbers: Iterable[int]) -> bool:
+        "Return True if exactly this combination has been drawn."
+        return to_mask(numbers) in self._exact
+
+    def find(self, numbers: Iterable[int]) -> List[str]:
+        "Return the dates of all draws of exactly this combination."
+        return [self.dates[pos] for pos in self._exact.get(to_mask(numbers), [])]
+
+    def matches(self, numbers: Iterable[int]) -> np.ndarray:
+        "Return an array with the number of matching numbers for each draw."
+        return popcount(self.masks & np.uint64(to_mask(numbers)))
+
+    def at_least(self, numbers: Iterable[int], min_matches: int) -> List[str]:
+        "Return the dates of all draws containing at least min_matches numbers."
+        positions = np.flatnonzero(self.matches(numbers) >= min_matches)
+        return [self.dates[pos] for pos in positions]
+
+    def count(self, numbers: Iterable[int]) -> int:
+        """Return the number of draws containing all numbers.
+
+        Use this to get the frequency of single numbers, pairs etc.
+        """
+        mask = np.uint64(to_mask(numbers))
+        return int(np.count_nonzero((self.masks & mask) == mask))
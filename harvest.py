@@ -4,15 +4,35 @@
 run havest_stats.py -h for usage.
 """
 import argparse
+import bisect
+import copy
 import csv
+import datetime
+import gzip
+import hashlib
 import json
+import logging
 import os
 import re
-from collections import UserDict
-from typing import Dict, List
+import sys
+import threading
+import time
+from collections import OrderedDict, UserDict
+from functools import lru_cache
+from operator import itemgetter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
 
 import requests
 
+try:
+    import zstandard
+except ImportError:  # zstd compression is optional
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
 BASEURL = "https://www.win2day.at/media/NN_W2D_STAT_Lotto_"  # 2021.csv
 OUTPUT_DIR = "data"
 
@@ -144,11 +164,9 @@ class DoubleLineDraw(SingleLineDraw):
                     )
 
 
-def read_from_url(url):
-    "Yield each line from url."
-    resp = requests.get(url)
-    resp.raise_for_status()
-    for line in resp.text.split("\n"):
+def filter_lines(text: str):
+    "Yield each line of text which contains data."
+    for line in text.split("\n"):
         if (
             line.strip()
             and not re.match(r"[;\s]{8}", line)
@@ -161,11 +179,17 @@ def read_from_url(url):
             yield line
 
 
-def harvest_modern(year: int) -> List[Dict]:
-    "Beginning from February 2017 we have yearly csv files."
+def read_from_url(url):
+    "Yield each line from url."
+    resp = requests.get(url)
+    resp.raise_for_status()
+    yield from filter_lines(resp.text)
+
+
+def parse_modern_lines(lines, year: int) -> List[Dict]:
+    "Parse the lines of a yearly csv file, where each draw has 2 lines."
     results = []
-    url = BASEURL + str(year) + ".csv"
-    for i, line in enumerate(read_from_url(url)):
+    for i, line in enumerate(lines):
         if i % 2 == 0:
             line_data = DoubleLineDraw(year)
             line_data.parse(line)
@@ -175,6 +199,12 @@ def harvest_modern(year: int) -> List[Dict]:
     return results
 
 
+def harvest_modern(year: int) -> List[Dict]:
+    "Beginning from February 2017 we have yearly csv files."
+    url = BASEURL + str(year) + ".csv"
+    return parse_modern_lines(read_from_url(url), year)
+
+
 def harvest_2010_to_2017(year):
     """Return data for a single year between 2010 and 2017.
 
@@ -226,7 +256,70 @@ def harvest_pre_2011(year: int) -> None:
     return results
 
 
-def fetch_data(year):
+def current_year() -> int:
+    "Return the current year."
+    return datetime.date.today().year
+
+
+class YearCache:
+    """A bounded LRU cache for parsed years.
+
+    Past years never change, so they are kept until they are evicted or
+    invalidated. Entries for the current year expire after ttl seconds.
+    get() returns deep copies, so callers can not change cached data.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 64,
+        ttl: float = 3600,
+        clock: Callable[[], float] = time.monotonic,
+        year_source: Callable[[], int] = current_year,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.year_source = year_source
+        self._entries = OrderedDict()  # year: (expires or None, data)
+        self._lock = threading.Lock()
+
+    def get(self, year: int, loader: Callable[[int], List[Dict]]) -> List[Dict]:
+        "Return data for year from the cache or call loader(year) to get it."
+        with self._lock:
+            entry = self._entries.get(year)
+            if entry is not None and (entry[0] is None or entry[0] > self.clock()):
+                self._entries.move_to_end(year)
+                return copy.deepcopy(entry[1])
+        data = loader(year)
+        expires = None
+        if year >= self.year_source():
+            expires = self.clock() + self.ttl
+        with self._lock:
+            self._entries[year] = (expires, copy.deepcopy(data))
+            self._entries.move_to_end(year)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return data
+
+    def invalidate(self, year: Optional[int] = None) -> None:
+        "Remove year (or all years if year is None) from the cache."
+        with self._lock:
+            if year is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(year, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, year):
+        return year in self._entries
+
+
+YEAR_CACHE = YearCache()
+
+
+def _fetch_year(year: int) -> List[Dict]:
     """Harvest data for a single year.
 
     This function knows how to deal with changing format.
@@ -247,80 +340,494 @@ def fetch_data(year):
     return data
 
 
-def write_json(data: List, data_dir: str, year: int, indent: bool = False) -> None:
+def fetch_data(year: int, use_cache: bool = True) -> List[Dict]:
+    """Harvest data for a single year.
+
+    Parsed years are kept in YEAR_CACHE, so repeated calls for the same year
+    do not download the data again. Set use_cache to False to bypass the
+    cache. Use YEAR_CACHE.invalidate() to drop cached years.
+    """
+    if use_cache:
+        return YEAR_CACHE.get(year, _fetch_year)
+    return _fetch_year(year)
+
+
+# File name suffixes of the supported compression formats.
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def open_file(
+    filename: str, mode: str = "r", compression: Optional[str] = None, level=None
+):
+    """Open filename as text file with optional streaming compression.
+
+    compression is one of the keys in COMPRESSION_SUFFIXES. If compression is
+    None when reading, it is guessed from the file suffix.
+    level sets the compression level (defaults of the compressor if None).
+    """
+    if compression is None and "r" in mode:
+        for name, suffix in COMPRESSION_SUFFIXES.items():
+            if suffix and filename.endswith(suffix):
+                compression = name
+    if compression is None:
+        return open(filename, mode, encoding="utf-8")
+    if compression == "gzip":
+        if level is None:
+            return gzip.open(filename, mode + "t", encoding="utf-8")
+        return gzip.open(filename, mode + "t", level, encoding="utf-8")
+    if compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd compression needs the zstandard package.")
+        cctx = None
+        if "w" in mode and level is not None:
+            cctx = zstandard.ZstdCompressor(level=level)
+        return zstandard.open(filename, mode + "t", cctx=cctx, encoding="utf-8")
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def output_filename(
+    data_dir: str, fmt: str, year: int, compression: Optional[str] = None
+) -> str:
+    "Return the name of the output file for year in format fmt."
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown compression: {compression}")
+    return os.path.join(
+        data_dir, fmt, f"{year}.{fmt}" + COMPRESSION_SUFFIXES[compression]
+    )
+
+
+def read_json(filename: str) -> List[Dict]:
+    "Read a (possibly compressed) json file created by write_json."
+    with open_file(filename) as jsonfile:
+        return json.load(jsonfile)
+
+
+def read_table(filename: str, delimiter: str = ";") -> List[List[str]]:
+    "Read all rows of a (possibly compressed) file created by write_table."
+    with open_file(filename) as infile:
+        return list(csv.reader(infile, delimiter=delimiter))
+
+
+def write_json(  # pylint: disable=R0913
+    data: List,
+    data_dir: str,
+    year: int,
+    indent: bool = False,
+    compression: Optional[str] = None,
+    level: Optional[int] = None,
+) -> None:
     "Write data of a single year into a json file in data_dir."
+    filename = output_filename(data_dir, "json", year, compression)
     os.makedirs(os.path.join(data_dir, "json"), exist_ok=True)
-    filename = os.path.join(data_dir, "json", f"{year}.json")
-    with open(filename, "w", encoding="utf-8") as jsonfile:
+    with open_file(filename, "w", compression, level) as jsonfile:
         if indent:
             json.dump(data, jsonfile, ensure_ascii=False, indent=2)
         else:
             json.dump(data, jsonfile, ensure_ascii=False)
 
 
-def write_csv(data: List, data_dir: str, year: int) -> None:
-    "Write data_ of a single year into a csv file."
-    rows = []
-    rows.append(
-        [
-            "date",
-            "numbers",
-            "zz",
-            "currency",
-            "count_6",
-            "winnings_6",
-            "count_5zz",
-            "winnings_5zz",
-            "count_5",
-            "winnings_5",
-            "count_4zz",
-            "winnings_4zz",
-            "count_4",
-            "winnings_4",
-            "count_3zz",
-            "winnings_3zz",
-            "count_3",
-            "winnings_3",
-        ]
-    )
-    for draw in data:
-        row = []
-        row.append(draw["date"])
-        row.append(",".join([str(n) for n in draw["numbers"]]))
-        row.append(draw["ZZ"])
-        row.append(draw["results"]["currency"])
-        row.append(draw["results"]["6"]["count"])
-        row.append(draw["results"]["6"]["winnings"])
-        if "5ZZ" in draw["results"]:
-            row.append(draw["results"]["5ZZ"]["count"])
-            row.append(draw["results"]["5ZZ"]["winnings"])
-        else:
-            row.append("")
-            row.append("")
-        row.append(draw["results"]["5"]["count"])
-        row.append(draw["results"]["5"]["winnings"])
-        if "4ZZ" in draw["results"]:
-            row.append(draw["results"]["4ZZ"]["count"])
-            row.append(draw["results"]["4ZZ"]["winnings"])
+# Lotto numbers as strings, so we do not have to convert them for each draw.
+_NUMBER_STRINGS = [str(number) for number in range(46)]
+
+
+def _join_numbers(numbers: List[int]) -> str:
+    "Convert the list of drawn numbers to a comma separated string."
+    return ",".join(map(_NUMBER_STRINGS.__getitem__, numbers))
+
+
+# Ordered list of all win classes as used in the results dict.
+WIN_CLASSES = ["6", "5ZZ", "5", "4ZZ", "4", "3ZZ", "3"]
+
+# The values of each win class written to tabular output.
+WIN_FIELDS = ["count", "winnings"]
+
+# The columns shared by all tabular output formats (see make_table_row).
+TABLE_COLUMNS = ["date", "numbers", "zz", "currency"] + [
+    f"{field}_{win_class.lower()}" for win_class in WIN_CLASSES for field in WIN_FIELDS
+]
+
+_get_win_fields = itemgetter(*WIN_FIELDS)
+# Values of a win class which does not exist in a draw (like 4ZZ before 2011).
+_MISSING_WIN = ("",) * len(WIN_FIELDS)
+
+
+def make_table_row(draw: Dict) -> List:
+    "Convert a draw into a row with the values of TABLE_COLUMNS."
+    results = draw["results"]
+    row = [
+        draw["date"],
+        _join_numbers(draw["numbers"]),
+        draw["ZZ"],
+        results["currency"],
+    ]
+    for win_class in WIN_CLASSES:
+        win = results.get(win_class)
+        if win is None:
+            row += _MISSING_WIN
         else:
-            row.append("")
-            row.append("")
-        row.append(draw["results"]["4"]["count"])
-        row.append(draw["results"]["4"]["winnings"])
-        if "3ZZ" in draw["results"]:
-            row.append(draw["results"]["3ZZ"]["count"])
-            row.append(draw["results"]["3ZZ"]["winnings"])
+            row += _get_win_fields(win)
+    return row
+
+
+def write_table(  # pylint: disable=R0913
+    data: List,
+    data_dir: str,
+    year: int,
+    fmt: str = "csv",
+    delimiter: str = ";",
+    compression: Optional[str] = None,
+    level: Optional[int] = None,
+) -> None:
+    """Write data of a single year into a tabular file.
+
+    The file is written to data_dir/fmt/year.fmt. Rows are generated lazily
+    by make_table_row, so no list of all rows has to be built.
+    """
+    filename = output_filename(data_dir, fmt, year, compression)
+    os.makedirs(os.path.join(data_dir, fmt), exist_ok=True)
+    with open_file(filename, "w", compression, level) as outfile:
+        writer = csv.writer(outfile, delimiter=delimiter)
+        writer.writerow(TABLE_COLUMNS)
+        writer.writerows(map(make_table_row, data))
+
+
+def write_csv(
+    data: List,
+    data_dir: str,
+    year: int,
+    compression: Optional[str] = None,
+    level: Optional[int] = None,
+) -> None:
+    "Write data_ of a single year into a csv file."
+    write_table(data, data_dir, year, "csv", ";", compression, level)
+
+
+def write_tsv(
+    data: List,
+    data_dir: str,
+    year: int,
+    compression: Optional[str] = None,
+    level: Optional[int] = None,
+) -> None:
+    "Write data of a single year into a tab separated file."
+    write_table(data, data_dir, year, "tsv", "\t", compression, level)
+
+
+# Lotto draws take place on Wednesday and Sunday. Results are published
+# in the evening, so we also poll on the following day.
+DRAW_DAYS = (2, 6)  # as in datetime.weekday()
+POLL_DAYS = (0, 2, 3, 6)
+
+
+class PollError(Exception):
+    "Raised if the watcher could not fetch or parse a file."
+
+
+def last_draw_day(year: int) -> datetime.date:
+    "Return the date of the last scheduled draw in year."
+    day = datetime.date(year, 12, 31)
+    while day.weekday() not in DRAW_DAYS:
+        day -= datetime.timedelta(days=1)
+    return day
+
+
+class Watcher:
+    """Poll the current year's csv file for new draws.
+
+    A single requests session is used for all polls and each poll is a
+    conditional request, so unchanged files are not downloaded again.
+    After new year the previous year is polled, too, until its last
+    scheduled draw has been fetched or a poll after the day following
+    this draw succeeded.
+    Clock and sleep can be replaced for testing.
+    """
+
+    def __init__(  # pylint: disable=R0913
+        self,
+        output_dir: str,
+        format: str = "both",
+        indent: bool = False,
+        interval: int = 900,
+        compression: Optional[str] = None,
+        level: Optional[int] = None,
+        session: Optional[requests.Session] = None,
+        clock: Callable[[], datetime.datetime] = datetime.datetime.now,
+        sleep: Callable[[float], None] = time.sleep,
+        timeout: float = 30,
+    ):
+        self.output_dir = output_dir
+        self.format = format
+        self.indent = indent
+        self.interval = interval
+        self.compression = compression
+        self.level = level
+        self.session = session or requests.Session()
+        self.clock = clock
+        self.sleep = sleep
+        self.timeout = timeout
+        self.years = {}  # year: {"draws": [...], "validators": {...}}
+        self.completed_years = set()
+
+    def _year_state(self, year: int) -> Dict:
+        "Return the state of year, loading its draws from existing json output."
+        if year not in self.years:
+            draws = []
+            filename = output_filename(self.output_dir, "json", year, self.compression)
+            if os.path.exists(filename):
+                draws = read_json(filename)
+            self.years[year] = {"draws": draws, "validators": {}}
+        return self.years[year]
+
+    def poll(self) -> List[Dict]:
+        """Fetch the file(s) of the watched year(s) and return new draws.
+
+        New draws are appended to the known draws and written to output_dir.
+        """
+        now = self.clock()
+        new_draws = []
+        previous_year = now.year - 1
+        if previous_year not in self.completed_years:
+            last_day = last_draw_day(previous_year)
+            # results of the last draw might still be published
+            in_grace_period = now.date() <= last_day + datetime.timedelta(days=1)
+            if previous_year in self.years or in_grace_period:
+                new_draws += self.poll_year(previous_year)
+            if not in_grace_period or any(
+                draw["date"] == last_day.isoformat()
+                for draw in self.years[previous_year]["draws"]
+            ):
+                self.completed_years.add(previous_year)
+                self.years.pop(previous_year, None)
+        new_draws += self.poll_year(now.year)
+        return new_draws
+
+    def poll_year(self, year: int) -> List[Dict]:
+        """Fetch the file of year and return new draws.
+
+        Raises PollError if the file can not be fetched or parsed.
+        """
+        state = self._year_state(year)
+        validators = state["validators"]
+        headers = {}
+        if "ETag" in validators:
+            headers["If-None-Match"] = validators["ETag"]
+        if "Last-Modified" in validators:
+            headers["If-Modified-Since"] = validators["Last-Modified"]
+        try:
+            resp = self.session.get(
+                BASEURL + str(year) + ".csv", headers=headers, timeout=self.timeout
+            )
+            if resp.status_code == 304:
+                return []
+            if resp.status_code == 404:  # no draws in a new year yet
+                return []
+            resp.raise_for_status()
+        except requests.RequestException as err:
+            raise PollError(f"Fetching draws of {year} failed: {err!r}") from err
+        try:
+            draws = parse_modern_lines(filter_lines(resp.text), year)
+        except (ValueError, IndexError) as err:
+            raise PollError(f"Parsing draws of {year} failed: {err!r}") from err
+        last_date = max((draw["date"] for draw in state["draws"]), default="")
+        new_draws = [draw for draw in draws if draw["date"] > last_date]
+        state["validators"] = {
+            key: resp.headers[key]
+            for key in ("ETag", "Last-Modified")
+            if key in resp.headers
+        }
+        if new_draws:
+            state["draws"] += new_draws
+            write_output(
+                state["draws"],
+                self.output_dir,
+                year,
+                self.format,
+                self.indent,
+                self.compression,
+                self.level,
+            )
+        return new_draws
+
+    def seconds_to_next_poll(self) -> float:
+        """Return the number of seconds to wait before the next poll.
+
+        On POLL_DAYS we poll every interval seconds, otherwise we wait
+        until the beginning of the next poll day.
+        """
+        now = self.clock()
+        if now.weekday() in POLL_DAYS:
+            return self.interval
+        next_day = datetime.datetime.combine(now.date(), datetime.time())
+        while True:
+            next_day += datetime.timedelta(days=1)
+            if next_day.weekday() in POLL_DAYS:
+                return (next_day - now).total_seconds()
+
+    def run(self, max_polls: Optional[int] = None) -> None:
+        """Poll until interrupted (or max_polls polls have been done).
+
+        Network and parse errors are logged and the poll is repeated later.
+        Other errors (like a corrupt output file) stop the watcher.
+        """
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            try:
+                self.poll()
+            except PollError as err:
+                logger.warning("%s Trying again at the next poll.", err)
+            polls += 1
+            self.sleep(self.seconds_to_next_poll())
+
+
+class DrawStore:
+    """Read-only, date indexed access to harvested draws.
+
+    Draws are kept sorted by date, so date ranges can be looked up via bisect.
+    """
+
+    def __init__(self, draws: List[Dict]):
+        self.draws = sorted(draws, key=lambda draw: draw["date"])
+        self.dates = [draw["date"] for draw in self.draws]
+
+    @classmethod
+    def from_dir(cls, data_dir: str) -> "DrawStore":
+        """Load all json files created by write_json from data_dir.
+
+        Compressed json files are read, too. If there is more than one file
+        for a year (e.g. 2020.json and 2020.json.gz), only the most recently
+        modified one is loaded. Files not named after a year are ignored.
+        """
+        json_dir = os.path.join(data_dir, "json")
+        if not os.path.isdir(json_dir):
+            raise FileNotFoundError(
+                f"No json data in '{json_dir}'. Harvest with --format json first."
+            )
+        files = {}  # year: (mtime, filename)
+        for filename in sorted(os.listdir(json_dir)):
+            for suffix in COMPRESSION_SUFFIXES.values():
+                if filename.endswith(".json" + suffix):
+                    year = filename[: -len(".json" + suffix)]
+                    if not year.isdigit():
+                        continue
+                    mtime = os.path.getmtime(os.path.join(json_dir, filename))
+                    if year not in files or mtime > files[year][0]:
+                        files[year] = (mtime, filename)
+        draws = []
+        for _, filename in files.values():
+            draws += read_json(os.path.join(json_dir, filename))
+        return cls(draws)
+
+    def between(self, first: str = "", last: str = "") -> List[Dict]:
+        "Return all draws between the dates first and last (both included)."
+        start = bisect.bisect_left(self.dates, first) if first else 0
+        end = bisect.bisect_right(self.dates, last) if last else len(self.dates)
+        return self.draws[start:end]
+
+    def year(self, year: int) -> List[Dict]:
+        "Return all draws of year."
+        return self.between(f"{year}-01-01", f"{year}-12-31")
+
+    def latest(self) -> Optional[Dict]:
+        "Return the most recent draw or None if there are no draws."
+        return self.draws[-1] if self.draws else None
+
+
+class DrawRequestHandler(BaseHTTPRequestHandler):
+    """Answer GET requests for draws.
+
+    Supported endpoints:
+        * /draws?from=yyyy-mm-dd&to=yyyy-mm-dd
+        * /year/<yyyy>
+        * /latest
+    """
+
+    def do_GET(self):  # pylint: disable=C0103
+        "Send the (cached) response for the requested path."
+        status, body, etag = self.server.render(self.path)
+        if status == 200 and self._etag_matches(etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 200:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _etag_matches(self, etag: str) -> bool:
+        """Return True if etag matches the If-None-Match header.
+
+        The header may contain a list of (weak) tags or '*'.
+        """
+        for tag in self.headers.get("If-None-Match", "").split(","):
+            tag = tag.strip()
+            if tag == "*" or tag.removeprefix("W/") == etag:
+                return True
+        return False
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        "Do not log each request to stderr."
+
+
+class DrawServer(ThreadingHTTPServer):
+    """A local http server for a DrawStore.
+
+    Serialized responses are kept in a LRU cache with cache_size entries.
+    """
+
+    def __init__(self, address, store: DrawStore, cache_size: int = 256):
+        super().__init__(address, DrawRequestHandler)
+        self.store = store
+        self.render = lru_cache(maxsize=cache_size)(self._render)
+
+    def _render(self, path: str) -> Tuple[int, bytes, str]:
+        "Return status, serialized body and etag for path."
+        url = urlsplit(path)
+        query = parse_qs(url.query)
+        parts = url.path.strip("/").split("/")
+        if parts == ["draws"]:
+            limits = []
+            for param in ("from", "to"):
+                value = query.get(param, [""])[0]
+                if value:
+                    try:
+                        value = datetime.date.fromisoformat(value).isoformat()
+                    except ValueError:
+                        return self._error(
+                            400, f"'{param}' must be a date like yyyy-mm-dd."
+                        )
+                limits.append(value)
+            data = self.store.between(*limits)
+        elif len(parts) == 2 and parts[0] == "year" and parts[1].isdigit():
+            data = self.store.year(int(parts[1]))
+        elif parts == ["latest"]:
+            data = self.store.latest()
+            if data is None:
+                return self._error(404, "No draws available.")
         else:
-            row.append("")
-            row.append("")
-        row.append(draw["results"]["3"]["count"])
-        row.append(draw["results"]["3"]["winnings"])
-        rows.append(row)
-    os.makedirs(os.path.join(data_dir, "csv"), exist_ok=True)
-    filename = os.path.join(data_dir, "csv", f"{year}.csv")
-    with open(filename, "w", encoding="utf-8") as csvfile:
-        writer = csv.writer(csvfile, delimiter=";")
-        writer.writerows(rows)
+            return self._error(404, f"Unknown endpoint: {url.path}")
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        return 200, body, '"' + hashlib.sha1(body).hexdigest() + '"'
+
+    @classmethod
+    def _error(cls, status: int, message: str) -> Tuple[int, bytes, str]:
+        "Return a response tuple for an error."
+        body = json.dumps({"error": message}).encode("utf-8")
+        return status, body, ""
+
+
+def serve(data_dir: str, port: int, host: str = "127.0.0.1") -> None:
+    "Serve the harvested data from data_dir until interrupted."
+    server = DrawServer((host, port), DrawStore.from_dir(data_dir))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
 
 
 def parse_args():
@@ -344,7 +851,7 @@ def parse_args():
         "years",
         action=YearAction,
         metavar="YEAR",
-        nargs="+",
+        nargs="*",
         help=(
             "Year(s) to fetch. Can be a single year, multiple years or an interval "
             "like '2010-2012', which harvests 2010, 2011 and 2012."
@@ -363,29 +870,126 @@ def parse_args():
     parser.add_argument(
         "-f",
         "--format",
-        choices=["csv", "json", "both"],
+        choices=["csv", "tsv", "json", "both"],
         default="both",
         help=(
-            "Set the output format. Allowed values are 'json', 'csv' or 'both'. "
-            "If not set or set to 'both', csv and json output will be produced."
+            "Set the output format. Allowed values are 'json', 'csv', 'tsv' or "
+            "'both'. If not set or set to 'both', csv and json output will be "
+            "produced."
         ),
     )
+    parser.add_argument(
+        "-c",
+        "--compress",
+        choices=["gzip", "zstd"],
+        default=None,
+        help=(
+            "Compress the output files with gzip (.gz) or zstd (.zst). "
+            "zstd needs the zstandard package."
+        ),
+    )
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        default=None,
+        help="Compression level (default depends on --compress).",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        default=False,
+        help=(
+            "Do not harvest, but serve the json data from the output directory "
+            "via http on localhost."
+        ),
+    )
+    parser.add_argument(
+        "-p", "--port", type=int, default=8045, help="port used by --serve"
+    )
+    parser.add_argument(
+        "-w",
+        "--watch",
+        action="store_true",
+        default=False,
+        help=(
+            "Do not harvest, but keep running and poll for new draws of the "
+            "current year."
+        ),
+    )
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=900,
+        help="seconds between polls on draw days (used by --watch)",
+    )
     args_ = parser.parse_args()
-    if min(args_.years) < 1986:
+    if args_.compress_level is not None and args_.compress is None:
+        parser.error("--compress-level needs --compress")
+    if not args_.years and not (args_.serve or args_.watch):
+        parser.error("at least one YEAR is required")
+    if args_.years and min(args_.years) < 1986:
         raise ValueError("No data before 1986.")
     return args_
 
 
-def main(years: List[int], output_dir: str, format: str, indent: bool = False) -> None:
+def write_output(  # pylint: disable=R0913
+    data: List,
+    output_dir: str,
+    year: int,
+    format: str,
+    indent: bool = False,
+    compression: Optional[str] = None,
+    level: Optional[int] = None,
+) -> None:
+    "Write data of a single year in the requested format(s)."
+    if format in ("json", "both"):
+        write_json(data, output_dir, year, indent, compression, level)
+    if format in ("csv", "both"):
+        write_csv(data, output_dir, year, compression, level)
+    if format == "tsv":
+        write_tsv(data, output_dir, year, compression, level)
+
+
+def main(  # pylint: disable=R0913
+    years: List[int],
+    output_dir: str,
+    format: str,
+    indent: bool = False,
+    compression: Optional[str] = None,
+    level: Optional[int] = None,
+) -> None:
     "Run the script."
     for year in years:
         data = fetch_data(year)
-        if format in ("json", "both"):
-            write_json(data, output_dir, year, indent)
-        if format in ("csv", "both"):
-            write_csv(data, output_dir, year)
+        write_output(data, output_dir, year, format, indent, compression, level)
 
 
 if __name__ == "__main__":
     args = parse_args()
-    main(args.years, args.output_dir, args.format, args.indent)
+    if args.serve:
+        try:
+            serve(args.output_dir, args.port)
+        except FileNotFoundError as err:
+            sys.exit(f"Can not serve data: {err}")
+    elif args.watch:
+        logging.basicConfig(format="%(asctime)s %(levelname)s: %(message)s")
+        try:
+            Watcher(
+                args.output_dir,
+                args.format,
+                args.indent,
+                args.interval,
+                args.compress,
+                args.compress_level,
+            ).run()
+        except KeyboardInterrupt:
+            pass
+    else:
+        main(
+            args.years,
+            args.output_dir,
+            args.format,
+            args.indent,
+            args.compress,
+            args.compress_level,
+        )
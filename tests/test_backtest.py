@@ -0,0 +1,119 @@
+"Test the Backtest class and ticket helpers."
+import numpy as np
+import pytest
+
+import backtest
+
+
+def make_draw(date, numbers, zz, results):
+    "Return a draw dict."
+    return {"date": date, "numbers": numbers, "ZZ": zz, "results": results}
+
+
+@pytest.fixture(name="draws")
+def fixture_draws():
+    "Return an old (ATS, no 4ZZ) and a new draw."
+    old = make_draw(
+        "1999-09-01",
+        [1, 2, 3, 4, 5, 6],
+        7,
+        {
+            "currency": "ATS",
+            "6": {"count": 1, "winnings": 137603},
+            "5ZZ": {"count": 1, "winnings": 13760.3},
+            "5": {"count": 1, "winnings": 1376.03},
+            "4": {"count": 1, "winnings": 137.603},
+            "3": {"count": 1, "winnings": 13.7603},
+        },
+    )
+    new = make_draw(
+        "2021-01-03",
+        [1, 2, 3, 4, 5, 6],
+        7,
+        {
+            "currency": "EUR",
+            "6": {"count": 1, "winnings": 10000},
+            "5ZZ": {"count": 1, "winnings": 1000},
+            "5": {"count": 1, "winnings": 100},
+            "4ZZ": {"count": 1, "winnings": 50},
+            "4": {"count": 1, "winnings": 10},
+            "3ZZ": {"count": 1, "winnings": 5},
+            "3": {"count": 1, "winnings": 1},
+        },
+    )
+    return [old, new]
+
+
+def test_tickets_to_masks():
+    "Tickets are converted to bitmasks and validated."
+    masks = backtest.tickets_to_masks([[1, 2, 3, 4, 5, 6]])
+    assert int(masks[0]) == 0b1111110
+    with pytest.raises(ValueError):
+        backtest.tickets_to_masks([[1, 2, 3, 4, 5]])
+    with pytest.raises(ValueError):
+        backtest.tickets_to_masks([[1, 2, 3, 4, 5, 46]])
+    with pytest.raises(ValueError):
+        backtest.tickets_to_masks([[1, 1, 3, 4, 5, 6]])
+    with pytest.raises(ValueError):
+        backtest.tickets_to_masks([[1.5, 2, 3, 4, 5, 6]])
+    with pytest.raises(ValueError):
+        backtest.tickets_to_masks([[-1, 2, 3, 4, 5, 6]])
+    with pytest.raises(ValueError):
+        backtest.tickets_to_masks([["1", "2", "3", "4", "5", "6"]])
+    with pytest.raises(ValueError):
+        backtest.tickets_to_masks([[0, 2, 3, 4, 5, 6]])
+
+
+def test_expand_system():
+    "A system with 7 numbers plays 7 tickets."
+    tickets = backtest.expand_system([7, 1, 2, 3, 4, 5, 6])
+    assert len(tickets) == 7
+    assert [1, 2, 3, 4, 5, 6] in tickets
+    with pytest.raises(ValueError):
+        backtest.expand_system([1, 2, 3])
+
+
+def test_quick_picks():
+    "Quick picks are reproducible and valid tickets."
+    tickets = backtest.quick_picks(1000, seed=1)
+    assert tickets.shape == (1000, 6)
+    assert np.array_equal(tickets, backtest.quick_picks(1000, seed=1))
+    assert len(backtest.tickets_to_masks(tickets)) == 1000
+
+
+def test_run(draws):
+    "Winnings are looked up per draw and class, ATS is converted to EUR."
+    result = backtest.Backtest(draws).run(
+        [
+            [1, 2, 3, 4, 5, 6],  # 6
+            [1, 2, 3, 4, 5, 7],  # 5ZZ
+            [1, 2, 3, 4, 7, 8],  # 4ZZ (4 in 1999)
+            [1, 2, 3, 10, 11, 12],  # 3
+            [20, 21, 22, 23, 24, 25],  # nothing
+        ]
+    )
+    assert result["tickets"] == 5
+    assert result["draws"] == 2
+    assert result["ticket_winnings"].tolist() == pytest.approx([20000, 2000, 60, 2, 0])
+    assert result["winnings"] == pytest.approx(22062)
+    assert result["classes"] == {
+        "6": 2,
+        "5ZZ": 2,
+        "5": 0,
+        "4ZZ": 2,
+        "4": 0,
+        "3ZZ": 0,
+        "3": 2,
+    }
+
+
+def test_run_chunked_and_processes(draws, monkeypatch):
+    "Chunking and multiple processes do not change the result."
+    tickets = backtest.quick_picks(500, seed=3)
+    expected = backtest.Backtest(draws).run(tickets)
+    monkeypatch.setattr(backtest, "CHUNK_CELLS", 100)
+    chunked = backtest.Backtest(draws).run(tickets)
+    assert np.array_equal(chunked["ticket_winnings"], expected["ticket_winnings"])
+    in_processes = backtest.Backtest(draws).run(tickets, processes=2)
+    assert in_processes["classes"] == expected["classes"]
+    assert in_processes["winnings"] == pytest.approx(expected["winnings"])
@@ -0,0 +1,57 @@
+"Test the DrawIndex class."
+import numpy as np
+import pytest
+
+import drawindex
+from drawindex import DrawIndex
+
+
+@pytest.fixture(name="index")
+def fixture_index():
+    "Return an index over 3 draws."
+    return DrawIndex(
+        [
+            {"date": "2021-01-03", "numbers": [1, 2, 3, 4, 5, 6]},
+            {"date": "2021-01-06", "numbers": [1, 2, 3, 40, 44, 45]},
+            {"date": "2021-01-10", "numbers": [1, 2, 3, 4, 5, 6]},
+        ]
+    )
+
+
+def test_to_mask():
+    "Bit n is set for number n."
+    assert drawindex.to_mask([1, 45]) == (1 << 1) | (1 << 45)
+    with pytest.raises(ValueError):
+        drawindex.to_mask([46])
+
+
+@pytest.mark.parametrize("native", [True, False])
+def test_popcount(monkeypatch, native):
+    "popcount counts the set bits of each element (with and without numpy 2)."
+    if not native:
+        monkeypatch.delattr(np, "bitwise_count", raising=False)
+    values = np.array([0, 1, 0b1011, 2**63 + 1, 2**64 - 1], dtype=np.uint64)
+    assert [int(val) for val in drawindex.popcount(values)] == [0, 1, 3, 2, 64]
+
+
+def test_contains_and_find(index):
+    "Exact combinations are found independent of the order of numbers."
+    assert index.contains([6, 5, 4, 3, 2, 1])
+    assert not index.contains([1, 2, 3, 4, 5, 7])
+    assert index.find([1, 2, 3, 4, 5, 6]) == ["2021-01-03", "2021-01-10"]
+    assert index.find([1, 2, 3, 4, 5, 7]) == []
+
+
+def test_matches_and_at_least(index):
+    "matches returns the overlap for each draw."
+    assert [int(m) for m in index.matches([1, 2, 40, 44, 7, 8])] == [2, 4, 2]
+    assert index.at_least([1, 2, 40, 44, 7, 8], 4) == ["2021-01-06"]
+    assert index.at_least([1, 2, 40, 44, 7, 8], 2) == index.dates
+
+
+def test_count(index):
+    "count returns the number of draws containing all numbers."
+    assert index.count([1]) == 3
+    assert index.count([4, 5]) == 2
+    assert index.count([4, 45]) == 0
+    assert len(index) == 3
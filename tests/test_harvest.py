@@ -1,5 +1,6 @@
 "Test the module function of harvest."
 import csv
+import gzip
 import json
 import os
 import tempfile
@@ -228,6 +229,7 @@ def test_fetch_data():
     So we do not mock the return values of these called functions, but
     the name of the called function for testing.
     """
+    harvest.YEAR_CACHE.invalidate()
     with patch("harvest.harvest_modern", return_value=["hm_modern"]):
         with patch("harvest.harvest_2010_to_2017", return_value=["hm_2010_17"]):
             with patch("harvest.harvest_pre_2011", return_value=["hm_pre_2011"]):
@@ -240,6 +242,76 @@ def test_fetch_data():
             with patch("harvest.harvest_pre_2011", return_value=["hm_pre_2011"]):
                 assert harvest.fetch_data(2010) == ["hm_pre_2011", "hm_2010_17"]
                 assert harvest.fetch_data(2017) == ["hm_2010_17", "hm_modern"]
+    harvest.YEAR_CACHE.invalidate()
+
+
+def test_fetch_data_cached():
+    "fetch_data only harvests a year once and returns copies."
+    harvest.YEAR_CACHE.invalidate()
+    with patch(
+        "harvest.harvest_pre_2011", return_value=[{"date": "1999-01-03"}]
+    ) as mock:
+        data = harvest.fetch_data(1999)
+        data[0]["date"] = "corrupted"
+        assert harvest.fetch_data(1999) == [{"date": "1999-01-03"}]
+        assert mock.call_count == 1
+        harvest.fetch_data(1999, use_cache=False)
+        assert mock.call_count == 2
+        harvest.YEAR_CACHE.invalidate(1999)
+        harvest.fetch_data(1999)
+        assert mock.call_count == 3
+    harvest.YEAR_CACHE.invalidate()
+
+
+def test_year_cache_lru():
+    "The least recently used year is evicted."
+    cache = harvest.YearCache(maxsize=2)
+    cache.get(2000, lambda year: [year])
+    cache.get(2001, lambda year: [year])
+    cache.get(2000, lambda year: [year])
+    cache.get(2002, lambda year: [year])
+    assert 2000 in cache
+    assert 2001 not in cache
+    assert len(cache) == 2
+
+
+def test_year_cache_ttl():
+    "Only the current year expires after ttl seconds."
+    now = [0]
+    current_year = 2021
+    cache = harvest.YearCache(ttl=10, clock=lambda: now[0], year_source=lambda: 2021)
+    calls = []
+
+    def loader(year):
+        calls.append(year)
+        return [year]
+
+    cache.get(current_year, loader)
+    cache.get(2000, loader)
+    now[0] = 11
+    cache.get(current_year, loader)
+    cache.get(2000, loader)
+    assert calls == [current_year, 2000, current_year]
+
+
+def test_year_cache_new_year():
+    "After new year the former current year is cached without ttl."
+    now = [0]
+    year = [2021]
+    cache = harvest.YearCache(ttl=10, clock=lambda: now[0], year_source=lambda: year[0])
+    calls = []
+
+    def loader(year):
+        calls.append(year)
+        return [year]
+
+    cache.get(2021, loader)
+    year[0] = 2022
+    now[0] = 11
+    cache.get(2021, loader)  # expired, loaded again without ttl
+    now[0] = 100
+    cache.get(2021, loader)
+    assert calls == [2021, 2021]
 
 
 def test_write_json(mockfulldata, tmpdir):
@@ -326,3 +398,78 @@ def test_write_csv_small_data(tmpdir, mocksmalldata, col_names):
         rows = list(reader)
         assert rows[0] == col_names
         assert rows[1] == expected_values
+
+
+def test_write_tsv(tmpdir, mockfulldata, col_names):
+    "TSV output uses the same columns as csv output."
+    expected_file = os.path.join(tmpdir, "tsv", "2017.tsv")
+    harvest.write_tsv([mockfulldata], tmpdir, 2017)
+    assert os.path.exists(expected_file)
+    with open(expected_file, encoding="utf-8") as tsvfile:
+        rows = list(csv.reader(tsvfile, delimiter="\t"))
+        assert rows[0] == col_names
+        assert rows[1][:4] == ["2017-08-15", "1,2,3,4,5,6", "7", "EUR"]
+
+
+def test_make_table_row(mocksmalldata, col_names):
+    "make_table_row returns a value for each column and '' for missing wins."
+    row = harvest.make_table_row(mocksmalldata)
+    assert harvest.TABLE_COLUMNS == col_names
+    assert len(row) == len(col_names)
+    assert row[:4] == ["2017-08-15", "1,2,3,4,5,6", 7, "EUR"]
+    assert row[col_names.index("count_4zz")] == ""
+    assert row[col_names.index("winnings_3")] == 12
+
+
+@pytest.mark.parametrize("compression,suffix", [("gzip", ".gz"), ("zstd", ".zst")])
+def test_write_json_compressed(mockfulldata, tmpdir, compression, suffix):
+    "Compressed json can be read in again by read_json."
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    harvest.write_json([mockfulldata], tmpdir, 2017, compression=compression, level=3)
+    expected_file = os.path.join(tmpdir, "json", "2017.json" + suffix)
+    assert os.path.exists(expected_file)
+    assert harvest.read_json(expected_file) == [mockfulldata]
+
+
+@pytest.mark.parametrize("compression,suffix", [("gzip", ".gz"), ("zstd", ".zst")])
+def test_write_csv_compressed(mockfulldata, tmpdir, col_names, compression, suffix):
+    "Compressed csv can be read in again by read_table."
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    harvest.write_csv([mockfulldata], tmpdir, 2017, compression=compression)
+    expected_file = os.path.join(tmpdir, "csv", "2017.csv" + suffix)
+    rows = harvest.read_table(expected_file)
+    assert rows[0] == col_names
+    assert rows[1][0] == "2017-08-15"
+
+
+def test_write_json_gzip_is_gzip(mockfulldata, tmpdir):
+    "The .gz file is a real gzip file."
+    harvest.write_json([mockfulldata], tmpdir, 2017, compression="gzip")
+    with gzip.open(os.path.join(tmpdir, "json", "2017.json.gz"), "rt") as jsonfile:
+        assert json.load(jsonfile) == [mockfulldata]
+
+
+def test_unknown_compression(tmpdir):
+    "Unknown compressions raise a ValueError."
+    with pytest.raises(ValueError):
+        harvest.open_file(os.path.join(tmpdir, "foo"), "w", "bz2")
+
+
+def test_write_unknown_compression(mockfulldata, tmpdir):
+    "Writers raise a ValueError for unknown compressions."
+    with pytest.raises(ValueError):
+        harvest.write_json([mockfulldata], tmpdir, 2017, compression="bz2")
+    with pytest.raises(ValueError):
+        harvest.write_csv([mockfulldata], tmpdir, 2017, compression="bz2")
+
+
+def test_compress_level_needs_compress():
+    "A compression level without compression is a usage error."
+    with patch("sys.argv", ["harvest.py", "--compress-level", "3", "2020"]):
+        with pytest.raises(SystemExit):
+            harvest.parse_args()
+    argv = ["harvest.py", "-c", "gzip", "--compress-level", "3", "2020"]
+    with patch("sys.argv", argv):
+        assert harvest.parse_args().compress_level == 3
@@ -0,0 +1,182 @@
+"""Memory and allocation budgets for the harvest pipeline.
+
+The harvest functions are run over large synthetic archives (served by the
+responses mock) while tracemalloc is active. If a budget is exceeded, the top
+allocation sites are part of the assertion message.
+"""
+import os
+import tempfile
+import tracemalloc
+
+import pytest
+import responses
+
+import harvest
+
+# pylint: disable=C0301
+NUM_DRAWS = 5000
+# Fixed allowance for buffers etc. which do not depend on the number of draws.
+BASE_BYTES = 256 * 1024
+
+MODERN_LINES = (
+    "{day:02d}.{month:02d}.;aufsteigend;1;13;24;30;36;38;Zz;19;6er;2;à;1.864.444,50;5er + ZZ;2;à;108.025,80;5er;160;à;1.473,00;4er + ZZ;477;à;172,90;;;;;;\n"
+    ";gezogen;38;24;13;36;30;1;Zz;19;4er;8.099;à;48,00;3er + ZZ;11.676;à;16,10;3er;135.104;à;5,10;ZZ;472.879;à;1,10;;;;;;"
+)
+LINES_2010_TO_2017 = "So;" + MODERN_LINES.replace("\n;", "\n;;")
+PRE_2011_LINE = "Mi.;{day:02d}.{month:02d}.;3;6;10;13;21;43;Zz:;7;4;à;5.442.999,00;15;à;271.997,00;415;à;14.746,00;19.480;à;418,00;296.846;à;34,00;10;43;21;13;3;6;Zz:;7;"
+YEAR_HEADER = "{year} Lotto - Beträge in {currency};;;;;;;;;;;;;;;;;;;;;;;;;;;;;;;;"
+
+
+def make_archive(template, num_draws, years=(), currency="EUR"):
+    """Return a csv archive with num_draws draws.
+
+    If years are given, the draws are split between these years, each
+    starting with a year header like in the multi-year archives.
+    """
+    lines = []
+    years = years or [None]
+    per_year = num_draws // len(years)
+    for year in years:
+        if year is not None:
+            lines.append(YEAR_HEADER.format(year=year, currency=currency))
+        for i in range(per_year):
+            lines.append(template.format(day=i % 28 + 1, month=i % 12 + 1))
+    return "\n".join(lines)
+
+
+def top_allocations(snapshot, limit=10):
+    "Return a printable list of the top allocation sites in snapshot."
+    stats = snapshot.statistics("lineno")[:limit]
+    return "\n".join(str(stat) for stat in stats)
+
+
+def run_traced(func, *args, **kwargs):
+    "Run func with tracemalloc and return result, peak memory and snapshot."
+    tracemalloc.start()
+    try:
+        result = func(*args, **kwargs)
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    return result, peak, snapshot
+
+
+def assert_peak(peak, snapshot, num_draws, bytes_per_draw):
+    "Assert that peak memory is within BASE_BYTES + bytes_per_draw per draw."
+    max_peak = BASE_BYTES + bytes_per_draw * num_draws
+    assert peak <= max_peak, (
+        f"Peak memory {peak} exceeds budget of {max_peak} bytes "
+        f"({num_draws} draws). Top allocations:\n{top_allocations(snapshot)}"
+    )
+
+
+def assert_blocks(snapshot, num_draws, blocks_per_draw):
+    """Assert the number of retained blocks allocated in harvest.py per draw.
+
+    This is mostly the per-draw dict creation.
+    """
+    own = snapshot.filter_traces([tracemalloc.Filter(True, harvest.__file__)])
+    blocks = sum(stat.count for stat in own.statistics("filename"))
+    max_blocks = blocks_per_draw * num_draws
+    assert blocks <= max_blocks, (
+        f"{blocks} blocks allocated in harvest.py exceed budget of "
+        f"{max_blocks} ({num_draws} draws). Top allocations:\n"
+        f"{top_allocations(own)}"
+    )
+
+
+@pytest.fixture(name="tmpdir")
+def fixture_tmpdir():
+    "Yield a temporary directory."
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield tmpdir
+
+
+@pytest.fixture(name="modern_data")
+def fixture_modern_data():
+    "Return NUM_DRAWS parsed draws."
+    lines = make_archive(MODERN_LINES, NUM_DRAWS).split("\n")
+    return harvest.parse_modern_lines(lines, 2020)
+
+
+@responses.activate
+def test_read_from_url_memory():
+    "read_from_url must not hold more than a few copies of the response."
+    body = make_archive(MODERN_LINES, NUM_DRAWS)
+    responses.add(responses.GET, "http://example.com/lotto.csv", body=body)
+    count, peak, snapshot = run_traced(
+        lambda: sum(1 for _ in harvest.read_from_url("http://example.com/lotto.csv"))
+    )
+    assert count == 2 * NUM_DRAWS
+    assert_peak(peak, snapshot, NUM_DRAWS, 4 * len(body) // NUM_DRAWS)
+
+
+@responses.activate
+def test_fetch_data_modern_memory():
+    "Harvesting a modern yearly file."
+    responses.add(
+        responses.GET,
+        harvest.BASEURL + "2020.csv",
+        body=make_archive(MODERN_LINES, NUM_DRAWS),
+    )
+    data, peak, snapshot = run_traced(harvest.fetch_data, 2020, use_cache=False)
+    assert len(data) == NUM_DRAWS
+    assert_peak(peak, snapshot, NUM_DRAWS, 6000)
+    assert_blocks(snapshot, len(data), 50)
+
+
+@responses.activate
+def test_harvest_2010_to_2017_memory():
+    "Harvesting a single year from the 2010-2017 archive."
+    years = range(2010, 2018)
+    responses.add(
+        responses.GET,
+        "https://www.win2day.at/media/lotto-ziehungen-2010-2017.csv",
+        body=make_archive(LINES_2010_TO_2017, NUM_DRAWS, years),
+    )
+    data, peak, snapshot = run_traced(harvest.harvest_2010_to_2017, 2012)
+    assert len(data) == NUM_DRAWS // len(years)
+    assert_peak(peak, snapshot, NUM_DRAWS, 2000)
+    assert_blocks(snapshot, len(data), 50)
+
+
+@responses.activate
+def test_harvest_pre_2011_memory():
+    "Harvesting a single year from the 1986-2010 archive."
+    years = range(1986, 2011)
+    responses.add(
+        responses.GET,
+        "https://www.win2day.at/media/lotto-ziehungen-1986-2010.csv",
+        body=make_archive(PRE_2011_LINE, NUM_DRAWS, years, "ATS"),
+    )
+    data, peak, snapshot = run_traced(harvest.harvest_pre_2011, 1999)
+    assert len(data) == NUM_DRAWS // len(years)
+    assert_peak(peak, snapshot, NUM_DRAWS, 1000)
+    assert_blocks(snapshot, len(data), 50)
+
+
+@pytest.mark.parametrize(
+    "writer", [harvest.write_json, harvest.write_csv, harvest.write_tsv]
+)
+def test_writer_memory(writer, modern_data, tmpdir):
+    "Writers must stream their output instead of building it in memory."
+    _, peak, snapshot = run_traced(writer, modern_data, tmpdir, 2020)
+    assert_peak(peak, snapshot, NUM_DRAWS, 100)
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd"])
+def test_compressed_writer_memory(compression, modern_data, tmpdir):
+    "Compressed output is streamed, too."
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    _, peak, snapshot = run_traced(
+        harvest.write_json, modern_data, tmpdir, 2020, compression=compression
+    )
+    assert os.path.exists(
+        os.path.join(
+            tmpdir, "json", "2020.json" + harvest.COMPRESSION_SUFFIXES[compression]
+        )
+    )
+    assert_peak(peak, snapshot, NUM_DRAWS, 100)
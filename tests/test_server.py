@@ -0,0 +1,152 @@
+"Test the DrawStore and the local query server."
+import os
+import tempfile
+import threading
+
+import pytest
+import requests
+
+import harvest
+
+
+def make_draw(date):
+    "Return a minimal draw dict for date."
+    return {"date": date, "numbers": [1, 2, 3, 4, 5, 6], "ZZ": 7, "results": {}}
+
+
+@pytest.fixture(name="store")
+def fixture_store():
+    "Return a DrawStore loaded from json files in a temporary directory."
+    with tempfile.TemporaryDirectory() as tmpdir:
+        harvest.write_json(
+            [make_draw("2020-12-30"), make_draw("2020-06-03")], tmpdir, 2020
+        )
+        harvest.write_json(
+            [make_draw("2021-01-03"), make_draw("2021-01-06")], tmpdir, 2021
+        )
+        yield harvest.DrawStore.from_dir(tmpdir)
+
+
+@pytest.fixture(name="baseurl")
+def fixture_baseurl(store):
+    "Run a DrawServer on a free local port and yield its base url."
+    server = harvest.DrawServer(("127.0.0.1", 0), store, cache_size=4)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_store_is_sorted(store):
+    "Draws from all files are sorted by date."
+    assert store.dates == ["2020-06-03", "2020-12-30", "2021-01-03", "2021-01-06"]
+
+
+def test_store_between(store):
+    "between() includes both limits and allows open ranges."
+    assert [d["date"] for d in store.between("2020-12-30", "2021-01-03")] == [
+        "2020-12-30",
+        "2021-01-03",
+    ]
+    assert len(store.between(last="2020-12-31")) == 2
+    assert len(store.between(first="2021-01-04")) == 1
+
+
+def test_store_year_and_latest(store):
+    "Test year() and latest()."
+    assert len(store.year(2020)) == 2
+    assert store.year(1999) == []
+    assert store.latest()["date"] == "2021-01-06"
+    assert harvest.DrawStore([]).latest() is None
+
+
+def test_endpoints(baseurl):
+    "All endpoints return the expected json data."
+    resp = requests.get(baseurl + "/draws?from=2020-07-01&to=2021-01-03")
+    assert resp.status_code == 200
+    assert [d["date"] for d in resp.json()] == ["2020-12-30", "2021-01-03"]
+    assert len(requests.get(baseurl + "/year/2021").json()) == 2
+    assert requests.get(baseurl + "/latest").json()["date"] == "2021-01-06"
+
+
+def test_unknown_endpoint(baseurl):
+    "Unknown paths result in a 404."
+    assert requests.get(baseurl + "/foo").status_code == 404
+    assert requests.get(baseurl + "/year/abc").status_code == 404
+
+
+def test_etag(baseurl):
+    "A matching If-None-Match header results in 304 without body."
+    resp = requests.get(baseurl + "/latest")
+    etag = resp.headers["ETag"]
+    resp = requests.get(baseurl + "/latest", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
+
+
+def test_response_cache(store):
+    "Rendered responses are cached."
+    server = harvest.DrawServer(("127.0.0.1", 0), store, cache_size=4)
+    try:
+        first = server.render("/year/2020")
+        assert server.render("/year/2020") is first
+        assert server.render.cache_info().hits == 1
+    finally:
+        server.server_close()
+
+
+def test_store_one_file_per_year():
+    "If a year exists compressed and uncompressed, the newest file is used."
+    with tempfile.TemporaryDirectory() as tmpdir:
+        harvest.write_json([make_draw("2020-06-03")], tmpdir, 2020)
+        harvest.write_json(
+            [make_draw("2020-06-03"), make_draw("2020-06-07")],
+            tmpdir,
+            2020,
+            compression="gzip",
+        )
+        newer = os.path.getmtime(os.path.join(tmpdir, "json", "2020.json")) + 10
+        os.utime(os.path.join(tmpdir, "json", "2020.json.gz"), (newer, newer))
+        store = harvest.DrawStore.from_dir(tmpdir)
+    assert store.dates == ["2020-06-03", "2020-06-07"]
+
+
+def test_etag_list_and_wildcard(baseurl):
+    "If-None-Match may contain a list of tags or '*', but no partial tags."
+    etag = requests.get(baseurl + "/latest").headers["ETag"]
+    for header, status in (
+        (f'"foo", {etag}', 304),
+        (f"W/{etag}", 304),
+        ("*", 304),
+        (etag[:-2] + '"', 200),
+        (f'"x{etag[1:]}', 200),
+    ):
+        resp = requests.get(baseurl + "/latest", headers={"If-None-Match": header})
+        assert resp.status_code == status, header
+
+
+def test_store_ignores_other_files():
+    "Only json files named after a year are loaded."
+    with tempfile.TemporaryDirectory() as tmpdir:
+        harvest.write_json([make_draw("2020-06-03")], tmpdir, 2020)
+        with open(
+            os.path.join(tmpdir, "json", "notes.json"), "w", encoding="utf-8"
+        ) as jsonfile:
+            jsonfile.write('{"foo": "bar"}')
+        assert harvest.DrawStore.from_dir(tmpdir).dates == ["2020-06-03"]
+
+
+def test_store_without_json_dir():
+    "A missing json directory results in a FileNotFoundError with a message."
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with pytest.raises(FileNotFoundError, match="--format json"):
+            harvest.DrawStore.from_dir(tmpdir)
+
+
+def test_invalid_dates(baseurl):
+    "from and to must be dates like yyyy-mm-dd."
+    for query in ("from=2020-05&to=2020-05", "to=abc", "from=2020-13-01"):
+        resp = requests.get(baseurl + "/draws?" + query)
+        assert resp.status_code == 400, query
+        assert "error" in resp.json()
@@ -0,0 +1,212 @@
+"Test the Watcher class used by --watch."
+import datetime
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+import pytest
+import responses
+
+import harvest
+
+# pylint: disable=C0301
+DRAW_1 = [
+    "03.01.;aufsteigend;1;13;24;30;36;38;Zz;19;6er;2;à;1.864.444,50;5er + ZZ;2;à;108.025,80;5er;160;à;1.473,00;4er + ZZ;477;à;172,90;;;;;;",
+    ";gezogen;38;24;13;36;30;1;Zz;19;4er;8.099;à;48,00;3er + ZZ;11.676;à;16,10;3er;135.104;à;5,10;ZZ;472.879;à;1,10;;;;;;",
+]
+DRAW_2 = [
+    "06.01.;aufsteigend;2;13;24;30;36;38;Zz;19;6er;2;à;1.864.444,50;5er + ZZ;2;à;108.025,80;5er;160;à;1.473,00;4er + ZZ;477;à;172,90;;;;;;",
+    ";gezogen;38;24;13;36;30;2;Zz;19;4er;8.099;à;48,00;3er + ZZ;11.676;à;16,10;3er;135.104;à;5,10;ZZ;472.879;à;1,10;;;;;;",
+]
+URL = harvest.BASEURL + "2021.csv"
+
+
+class FakeClock:
+    "A clock which only advances when sleep is called."
+
+    def __init__(self, now):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        "Advance the clock by seconds."
+        self.sleeps.append(seconds)
+        self.now += datetime.timedelta(seconds=seconds)
+
+
+@pytest.fixture(name="tmpdir")
+def fixture_tmpdir():
+    "Yield a temporary directory."
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield tmpdir
+
+
+def make_watcher(tmpdir, now):
+    "Return a json writing Watcher using a FakeClock set to now."
+    clock = FakeClock(now)
+    return harvest.Watcher(tmpdir, "json", clock=clock, sleep=clock.sleep)
+
+
+@responses.activate
+def test_poll_appends_new_draws(tmpdir):
+    "Only draws not already known are returned and written."
+    watcher = make_watcher(tmpdir, datetime.datetime(2021, 1, 3, 20))
+    responses.add(responses.GET, URL, body="\n".join(DRAW_1), headers={"ETag": '"a"'})
+    assert [d["date"] for d in watcher.poll()] == ["2021-01-03"]
+
+    responses.replace(
+        responses.GET, URL, body="\n".join(DRAW_1 + DRAW_2), headers={"ETag": '"b"'}
+    )
+    assert [d["date"] for d in watcher.poll()] == ["2021-01-06"]
+    assert responses.calls[1].request.headers["If-None-Match"] == '"a"'
+
+    with open(os.path.join(tmpdir, "json", "2021.json"), encoding="utf-8") as jsonfile:
+        assert [d["date"] for d in json.load(jsonfile)] == ["2021-01-03", "2021-01-06"]
+
+
+@responses.activate
+def test_poll_not_modified(tmpdir):
+    "A 304 response results in no new draws."
+    watcher = make_watcher(tmpdir, datetime.datetime(2021, 1, 3, 20))
+    responses.add(responses.GET, URL, status=304)
+    assert watcher.poll() == []
+
+
+@responses.activate
+def test_poll_loads_existing_output(tmpdir):
+    "Draws already written to the output dir are not reported as new."
+    harvest.write_json(harvest.parse_modern_lines(DRAW_1, 2021), tmpdir, 2021)
+    watcher = make_watcher(tmpdir, datetime.datetime(2021, 1, 6, 20))
+    responses.add(responses.GET, URL, body="\n".join(DRAW_1 + DRAW_2))
+    assert [d["date"] for d in watcher.poll()] == ["2021-01-06"]
+
+
+def test_seconds_to_next_poll(tmpdir):
+    "Poll every interval on poll days, else wait for the next poll day."
+    # 2021-01-06 is a Wednesday
+    watcher = make_watcher(tmpdir, datetime.datetime(2021, 1, 6, 12))
+    assert watcher.seconds_to_next_poll() == watcher.interval
+    # Friday noon: wait until Sunday 0:00
+    watcher.clock.now = datetime.datetime(2021, 1, 8, 12)
+    assert watcher.seconds_to_next_poll() == 36 * 3600
+
+
+@responses.activate
+def test_run(tmpdir):
+    "run() polls and sleeps using the injected clock."
+    watcher = make_watcher(tmpdir, datetime.datetime(2021, 1, 3, 20))
+    responses.add(responses.GET, URL, status=304)
+    watcher.run(max_polls=3)
+    assert len(responses.calls) == 3
+    assert watcher.clock.sleeps == [900, 900, 900]
+
+
+def test_last_draw_day():
+    "The last draw of a year is on the last Wednesday or Sunday."
+    assert harvest.last_draw_day(2020) == datetime.date(2020, 12, 30)
+    assert harvest.last_draw_day(2023) == datetime.date(2023, 12, 31)
+
+
+@responses.activate
+def test_poll_previous_year_after_new_year(tmpdir):
+    "The last draw of a year is fetched even if it is published after new year."
+    url_2023 = harvest.BASEURL + "2023.csv"
+    url_2024 = harvest.BASEURL + "2024.csv"
+    last_draw = [DRAW_1[0].replace("03.01.", "31.12."), DRAW_1[1]]
+    watcher = make_watcher(tmpdir, datetime.datetime(2023, 12, 31, 23, 50))
+    responses.add(responses.GET, url_2023, body="\n".join(DRAW_1))
+    watcher.poll()
+
+    watcher.clock.now = datetime.datetime(2024, 1, 1, 0, 5)
+    responses.replace(responses.GET, url_2023, body="\n".join(DRAW_1 + last_draw))
+    responses.add(responses.GET, url_2024, status=404)
+    assert [d["date"] for d in watcher.poll()] == ["2023-12-31"]
+
+    # 2023 is complete now, so only 2024 is polled
+    num_calls = len(responses.calls)
+    watcher.poll()
+    assert [call.request.url for call in responses.calls[num_calls:]] == [url_2024]
+
+
+@responses.activate
+def test_poll_previous_year_until_day_after(tmpdir):
+    "Without the last draw, the previous year is polled until the day after it."
+    url_2023 = harvest.BASEURL + "2023.csv"
+    url_2024 = harvest.BASEURL + "2024.csv"
+    responses.add(responses.GET, url_2023, body="\n".join(DRAW_1))
+    responses.add(responses.GET, url_2024, status=404)
+    watcher = make_watcher(tmpdir, datetime.datetime(2024, 1, 1, 12))
+    watcher.poll()
+    watcher.poll()
+    watcher.clock.now = datetime.datetime(2024, 1, 2, 0, 5)
+    watcher.poll()  # last poll of 2023
+    watcher.poll()
+    assert [call.request.url for call in responses.calls].count(url_2023) == 3
+
+
+@responses.activate
+def test_poll_unordered_source(tmpdir):
+    "New draws are detected by the latest known date, not the last draw."
+    harvest.write_json(harvest.parse_modern_lines(DRAW_2 + DRAW_1, 2021), tmpdir, 2021)
+    watcher = make_watcher(tmpdir, datetime.datetime(2021, 1, 6, 20))
+    responses.add(responses.GET, URL, body="\n".join(DRAW_2 + DRAW_1))
+    assert watcher.poll() == []
+
+
+@responses.activate
+def test_poll_uses_timeout(tmpdir):
+    "Requests are sent with the watcher's timeout."
+    watcher = make_watcher(tmpdir, datetime.datetime(2021, 1, 3, 20))
+    watcher.timeout = 5
+    responses.add(responses.GET, URL, status=304)
+    watcher.poll()
+    assert responses.calls[0].request.req_kwargs["timeout"] == 5
+
+
+@responses.activate
+def test_run_survives_parse_errors(tmpdir, caplog):
+    "A malformed line does not stop run(), but is logged."
+    watcher = make_watcher(tmpdir, datetime.datetime(2021, 1, 3, 20))
+    responses.add(responses.GET, URL, body="03.01.;aufsteigend;x;y\n;gezogen")
+    watcher.run(max_polls=2)
+    assert len(responses.calls) == 2
+    assert len(caplog.records) == 2
+    assert "Parsing draws of 2021 failed" in caplog.records[0].getMessage()
+
+
+@responses.activate
+def test_run_logs_network_errors(tmpdir, caplog):
+    "Server errors do not stop run(), but are logged."
+    watcher = make_watcher(tmpdir, datetime.datetime(2021, 1, 3, 20))
+    responses.add(responses.GET, URL, status=500)
+    watcher.run(max_polls=1)
+    assert "Fetching draws of 2021 failed" in caplog.records[0].getMessage()
+
+
+def test_run_fails_on_corrupt_output(tmpdir):
+    "A corrupt json output file stops the watcher."
+    os.makedirs(os.path.join(tmpdir, "json"))
+    with open(
+        os.path.join(tmpdir, "json", "2021.json"), "w", encoding="utf-8"
+    ) as jsonfile:
+        jsonfile.write("[{")
+    watcher = make_watcher(tmpdir, datetime.datetime(2021, 1, 3, 20))
+    with pytest.raises(json.JSONDecodeError):
+        watcher.run(max_polls=3)
+
+
+@responses.activate
+def test_poll_writes_with_compression_level(tmpdir):
+    "Compression and level are passed to the writers."
+    clock = FakeClock(datetime.datetime(2021, 1, 3, 20))
+    watcher = harvest.Watcher(
+        tmpdir, "json", compression="gzip", level=1, clock=clock, sleep=clock.sleep
+    )
+    responses.add(responses.GET, URL, body="\n".join(DRAW_1))
+    with patch("harvest.write_json") as write_json:
+        watcher.poll()
+    assert write_json.call_args.args[-2:] == ("gzip", 1)